@@ -1,23 +1,49 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
-import json
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import bisect
+import contextlib
+import logging
+import orjson
+import marshal
+import mmap
+import multiprocessing
+import os
 import time
-import subprocess
+import aiofiles
+import aiorwlock
+import aiosqlite
+import anyio
+import anyio.to_thread
+import sandbox
 
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 QUESTIONS_FILE = DATA_DIR / "questions.json"
-STORE_FILE = DATA_DIR / "store.json"
+STORE_FILE = DATA_DIR / "store.json"  # legacy, imported into STORE_DB on first start
+STORE_DB = DATA_DIR / "store.db"
+LEADERBOARD_SIZE = 100
+FLUSH_INTERVAL_SEC = 0.5
 
-app = FastAPI(title="QOTD Backend - TechLearn Demo")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="QOTD Backend - TechLearn Demo", default_response_class=ORJSONResponse)
 
 # ---------- Models ----------
 class TestCase(BaseModel):
     input: Optional[str] = None
     expected_output: str
+    # normalized once per test case instead of on every comparison; not part of the schema
+    _expected_stripped: str = PrivateAttr("")
+
+    def model_post_init(self, __context: Any) -> None:
+        self._expected_stripped = self.expected_output.strip()
 
 class Question(BaseModel):
     id: str
@@ -53,6 +79,8 @@ class SubmissionResponse(BaseModel):
     results: List[TestResult]
     time_ms: float
     message: Optional[str] = None
+    # set when the evaluator itself failed (worker crash/hang), so the attempt is not held against the user
+    _evaluator_failed: bool = PrivateAttr(False)
 
 class Stats(BaseModel):
     attempts: int = 0
@@ -65,13 +93,50 @@ class LeaderboardEntry(BaseModel):
     correct: bool
     time_ms: float
 
-# ---------- Simple JSON-backed datastore ----------
+# ---------- Datastore: questions in JSON, stats/leaderboard in SQLite ----------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats (
+    q_id TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    total_time_ms REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS leaderboard (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    q_id TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    time_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lb ON leaderboard(correct DESC, time_ms ASC);
+"""
+SCHEMA_VERSION = 1
+
 class DataStore:
-    def __init__(self, questions_file: Path, store_file: Path):
+    def __init__(self, questions_file: Path, db_file: Path, legacy_store_file: Optional[Path] = None):
         self.questions_file = questions_file
-        self.store_file = store_file
+        self.db_file = db_file
+        # store.json (+ store.log) from before the SQLite switch, imported once into a new database
+        self.legacy_store_file = legacy_store_file
+        self.questions: Dict[str, Dict[str, Any]] = {}
+        self._questions_models: Dict[str, Question] = {}
+        # pre-serialized response bodies per question: (public, with expected_solution)
+        self._questions_json: Dict[str, Tuple[bytes, bytes]] = {}
+        self._sorted_qids: List[str] = []
+        self._today_cache: Optional[Tuple[int, Question]] = None  # (day number, question)
+        self._db: Optional[aiosqlite.Connection] = None
+        # one shared connection: a submission's transaction must not interleave with other writes,
+        # and readers must not observe it half-applied; reads may run alongside each other.
+        # Created in open(): asyncio primitives bind to the loop that first uses them.
+        self._rw: Optional[aiorwlock.RWLock] = None
+        # bumped on every question-bank change; lets a slow write of an older snapshot lose to a newer one
+        self._questions_version = 0
+        self._questions_persisted = 0
+        # submissions waiting for the next group commit; stats/leaderboard reads lag by up to FLUSH_INTERVAL_SEC
+        self._pending: List[Tuple[str, str, bool, float]] = []
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._flusher_task: Optional[asyncio.Task] = None
         self._ensure_files()
-        self._load()
 
     def _ensure_files(self):
         if not self.questions_file.exists():
@@ -106,176 +171,416 @@ class DataStore:
                     "expected_solution": "def solve(input_str):\n    return input_str[::-1]"
                 }
             ]
-            self.questions_file.write_text(json.dumps(sample, indent=2))
-        if not self.store_file.exists():
-            store = {"stats": {}, "leaderboard": []}
-            self.store_file.write_text(json.dumps(store, indent=2))
-
-    def _load(self):
-        with open(self.questions_file, "r", encoding="utf-8") as f:
-            self.questions = {q["id"]: q for q in json.load(f)}
-        with open(self.store_file, "r", encoding="utf-8") as f:
-            self.store = json.load(f)
-
-    def save_store(self):
-        with open(self.store_file, "w", encoding="utf-8") as f:
-            json.dump(self.store, f, indent=2)
+            self.questions_file.write_bytes(orjson.dumps(sample, option=orjson.OPT_INDENT_2))
+
+    def _read_questions_file(self) -> List[Dict[str, Any]]:
+        # orjson parses straight out of the mapped pages, skipping the read() copy into a bytes object
+        with open(self.questions_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # empty files cannot be mapped; let orjson report the decode error
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+
+    async def _load(self):
+        raw = await anyio.to_thread.run_sync(self._read_questions_file)
+        self.questions = {q["id"]: q for q in raw}
+        # validated once here; request handlers share these instances and must not mutate them
+        self._questions_models = {qid: Question(**raw) for qid, raw in self.questions.items()}
+        self._questions_json = {qid: self._serialize_question(q) for qid, q in self._questions_models.items()}
+        self._sorted_qids = sorted(self.questions.keys())
+        self._today_cache = None
+
+    async def open(self):
+        self._rw = aiorwlock.RWLock()
+        self._dirty_event = asyncio.Event()
+        if self._pending:
+            self._dirty_event.set()
+        await self._load()
+        self._db = await aiosqlite.connect(self.db_file)
+        # WAL lets readers proceed while a submission is being written; NORMAL is durable enough under WAL
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        async with self._db.execute("PRAGMA user_version") as cur:
+            (version,) = await cur.fetchone()
+        if version < SCHEMA_VERSION:
+            await self._db.executescript(SCHEMA)
+            await self._import_legacy_store()
+            await self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            await self._db.commit()
+        self._flusher_task = asyncio.create_task(self._flusher())
+
+    async def close(self):
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            # wait for it to finish: a flush interrupted mid-write rolls back and requeues its batch
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher_task
+            self._flusher_task = None
+        if self._db is not None:
+            await self._flush()
+            await self._db.close()
+            self._db = None
+
+    async def _import_legacy_store(self):
+        if self.legacy_store_file is None or not self.legacy_store_file.exists():
+            return
+        async with aiofiles.open(self.legacy_store_file, "rb") as f:
+            legacy = orjson.loads(await f.read())
+        await self._db.executemany(
+            "INSERT INTO stats (q_id, attempts, successes, total_time_ms) VALUES (?, ?, ?, ?)",
+            [(q_id, s["attempts"], s["successes"], s["total_time_ms"]) for q_id, s in legacy.get("stats", {}).items()],
+        )
+        await self._db.executemany(
+            "INSERT INTO leaderboard (user, q_id, correct, time_ms) VALUES (?, ?, ?, ?)",
+            [(e["user"], e["q_id"], e["correct"], e["time_ms"]) for e in legacy.get("leaderboard", [])],
+        )
+        # submissions that were logged but never compacted into store.json
+        log_file = self.legacy_store_file.with_suffix(".log")
+        if log_file.exists():
+            rows = []
+            async with aiofiles.open(log_file, "rb") as f:
+                async for line in f:
+                    if line.strip():
+                        e = orjson.loads(line)
+                        rows.append((e["q_id"], e["user"], e["correct"], e["time_ms"]))
+            await self._record(rows)
+
+    async def _record(self, rows: List[Tuple[str, str, bool, float]]):
+        # rows are (q_id, user, correct, time_ms)
+        await self._db.executemany(
+            "INSERT INTO stats (q_id, attempts, successes, total_time_ms) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT(q_id) DO UPDATE SET attempts = attempts + 1, successes = successes + excluded.successes, "
+            "total_time_ms = total_time_ms + excluded.total_time_ms",
+            [(q_id, int(correct), time_ms) for q_id, _, correct, time_ms in rows],
+        )
+        await self._db.executemany(
+            "INSERT INTO leaderboard (user, q_id, correct, time_ms) VALUES (?, ?, ?, ?)",
+            [(user, q_id, int(correct), time_ms) for q_id, user, correct, time_ms in rows],
+        )
+        # keep top 100
+        await self._db.execute(
+            "DELETE FROM leaderboard WHERE id IN "
+            "(SELECT id FROM leaderboard ORDER BY correct DESC, time_ms ASC, id ASC LIMIT -1 OFFSET ?)",
+            (LEADERBOARD_SIZE,),
+        )
+
+    @staticmethod
+    def _serialize_question(q: Question) -> Tuple[bytes, bytes]:
+        # same shape the QuestionOut response_model produced: the hidden variant keeps expected_solution as null
+        out = q.model_dump()
+        return orjson.dumps({**out, "expected_solution": None}), orjson.dumps(out)
+
+    def get_question_json(self, q_id: str, reveal: bool = False) -> bytes:
+        if q_id not in self._questions_json:
+            raise KeyError("Question not found")
+        return self._questions_json[q_id][reveal]
 
     def get_today(self) -> Question:
         # Simple deterministic "today" selector: pick by day number
-        qids = sorted(self.questions.keys())
-        idx = int(time.time() // 86400) % len(qids)
-        return Question(**self.questions[qids[idx]])
+        day = int(time.time() // 86400)
+        if self._today_cache is not None and self._today_cache[0] == day:
+            return self._today_cache[1]
+        qids = self._sorted_qids
+        q = self._questions_models[qids[day % len(qids)]]
+        self._today_cache = (day, q)
+        return q
 
     def get_question(self, q_id: str) -> Question:
-        q = self.questions.get(q_id)
+        q = self._questions_models.get(q_id)
         if not q:
             raise KeyError("Question not found")
-        return Question(**q)
+        return q
 
-    def add_question(self, q: Dict[str, Any]):
+    async def add_question(self, q: Dict[str, Any]):
         if q["id"] in self.questions:
             raise KeyError("Question already exists")
         self.questions[q["id"]] = q
-        # persist to file
-        with open(self.questions_file, "w", encoding="utf-8") as f:
-            json.dump(list(self.questions.values()), f, indent=2)
-
-    def update_stats(self, q_id: str, user: str, correct: bool, time_ms: float):
-        stats = self.store.setdefault("stats", {}).setdefault(q_id, {"attempts": 0, "successes": 0, "total_time_ms": 0.0})
-        stats["attempts"] += 1
-        if correct:
-            stats["successes"] += 1
-        stats["total_time_ms"] += time_ms
-        # update leaderboard (simple: append and sort by correct desc then time)
-        self.store.setdefault("leaderboard", []).append({"user": user, "q_id": q_id, "correct": correct, "time_ms": time_ms})
-        # keep top 100
-        self.store["leaderboard"] = sorted(self.store["leaderboard"], key=lambda x: (not x["correct"], x["time_ms"]))[:100]
-        self.save_store()
-
-    def get_stats(self, q_id: str) -> Stats:
-        s = self.store.setdefault("stats", {}).get(q_id, {"attempts": 0, "successes": 0, "total_time_ms": 0.0})
-        avg = (s["total_time_ms"] / s["attempts"]) if s["attempts"] else 0.0
-        return Stats(attempts=s["attempts"], successes=s["successes"], average_time_ms=avg)
-
-    def get_leaderboard(self, top: int = 10) -> List[LeaderboardEntry]:
-        lb = [LeaderboardEntry(**e) for e in self.store.get("leaderboard", [])][:top]
+        self._questions_models[q["id"]] = Question(**q)
+        self._questions_json[q["id"]] = self._serialize_question(self._questions_models[q["id"]])
+        bisect.insort(self._sorted_qids, q["id"])
+        self._today_cache = None
+        self._questions_version += 1
+        version = self._questions_version
+        # persist to file: serialize and write a temp file without holding anything, then swap it in
+        s = orjson.dumps(list(self.questions.values()), option=orjson.OPT_INDENT_2)
+        tmp = self.questions_file.with_suffix(f".json.{version}.tmp")
+        async with aiofiles.open(tmp, "wb") as f:
+            await f.write(s)
+        # no await between the check and the rename, so concurrent add_question calls cannot race here
+        if version > self._questions_persisted:
+            os.replace(tmp, self.questions_file)
+            self._questions_persisted = version
+        else:
+            tmp.unlink(missing_ok=True)
+
+    async def update_stats(self, q_id: str, user: str, correct: bool, time_ms: float):
+        # group commit: queue the submission and let the flusher write the whole burst in one transaction
+        self._pending.append((q_id, user, correct, time_ms))
+        self._dirty_event.set()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        async with self._rw.writer:
+            # take the batch only once the writer lock is held, so cancellation while waiting for it loses nothing
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                await self._db.execute("BEGIN IMMEDIATE")
+                await self._record(rows)
+                await self._db.commit()
+            except BaseException:
+                # also on cancellation (shutdown): undo the partial transaction and keep the batch for the next flush
+                await self._db.rollback()
+                self._pending = rows + self._pending
+                raise
+
+    async def _flusher(self):
+        while True:
+            await self._dirty_event.wait()
+            await asyncio.sleep(FLUSH_INTERVAL_SEC)
+            self._dirty_event.clear()
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception("Failed to flush %d submissions; will retry", len(self._pending))
+                self._dirty_event.set()
+
+    async def get_stats(self, q_id: str) -> Stats:
+        async with self._rw.reader:
+            async with self._db.execute("SELECT attempts, successes, total_time_ms FROM stats WHERE q_id = ?", (q_id,)) as cur:
+                row = await cur.fetchone()
+        attempts, successes, total_time_ms = row if row else (0, 0, 0.0)
+        avg = (total_time_ms / attempts) if attempts else 0.0
+        return Stats(attempts=attempts, successes=successes, average_time_ms=avg)
+
+    async def get_leaderboard(self, top: int = 10) -> List[Dict[str, Any]]:
+        async with self._rw.reader:
+            async with self._db.execute(
+                "SELECT user, q_id, correct, time_ms FROM leaderboard ORDER BY correct DESC, time_ms ASC, id ASC LIMIT ?", (top,)
+            ) as cur:
+                rows = await cur.fetchall()
+        # plain dicts shaped like LeaderboardEntry; rows come from our own table, so no model round-trip
+        lb = [{"user": user, "q_id": q_id, "correct": bool(correct), "time_ms": time_ms} for user, q_id, correct, time_ms in rows]
         return lb
 
-store = DataStore(QUESTIONS_FILE, STORE_FILE)
+store = DataStore(QUESTIONS_FILE, STORE_DB, legacy_store_file=STORE_FILE)
+
+@app.on_event("startup")
+async def startup():
+    if not PY_EVAL_INPROCESS and not sandbox.POOL_SUPPORTED:
+        raise RuntimeError("the Python worker pool needs a POSIX host; set QOTD_PY_INPROCESS=1 to evaluate submissions in-process")
+    # the default limiter only hands out 40 threadpool slots; submissions are evaluated there
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 200
+    await store.open()
+    global python_pool, PY_EVAL_SEM, PY_EVAL_TURN
+    PY_EVAL_TURN = asyncio.Lock()
+    if PY_EVAL_INPROCESS:
+        PY_EVAL_SEM = asyncio.Semaphore(PY_MAX_CONCURRENT_EVALS)
+    else:
+        PY_EVAL_SEM = asyncio.Semaphore(PY_POOL_SIZE)
+        python_pool = _new_python_pool()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await store.close()
+    global python_pool
+    if python_pool is not None:
+        # cleared first so a batch whose guard fires during shutdown does not try to replace the pool
+        pool, python_pool = python_pool, None
+        pool.shutdown(wait=False, cancel_futures=True)
 
 # ---------- Evaluation helpers ----------
 
-def _compare_outputs(expected: str, actual: str) -> bool:
+def _compare_outputs(tc: TestCase, actual: str) -> bool:
     # basic normalization
-    return expected.strip() == (actual or "").strip()
+    return tc._expected_stripped == (actual or "").strip()
+
 
+# Results below are built with model_construct: every field is computed here from already-validated
+# questions, so pydantic validation would only repeat work.
 
 def evaluate_output_submission(q: Question, answer: str) -> SubmissionResponse:
     results = []
     passed = 0
     start = time.time()
+    # the same answer is checked against every case, so normalize it once
+    ans = (answer or "").strip()
     for tc in q.test_cases:
-        ok = _compare_outputs(tc["expected_output"], answer)
-        results.append(TestResult(input=tc.get("input"), expected_output=tc["expected_output"], actual_output=answer, passed=ok, error=None))
+        ok = tc._expected_stripped == ans
+        results.append(TestResult.model_construct(input=tc.input, expected_output=tc.expected_output, actual_output=answer, passed=ok, error=None))
         if ok:
             passed += 1
     end = time.time()
-    return SubmissionResponse(correct=(passed == len(q.test_cases)), passed_count=passed, total=len(q.test_cases), results=results, time_ms=(end - start) * 1000)
+    return SubmissionResponse.model_construct(correct=(passed == len(q.test_cases)), passed_count=passed, total=len(q.test_cases), results=results, time_ms=(end - start) * 1000)
+
+
+# ---------- Python sandbox worker pool ----------
+# WARNING: executing arbitrary code is unsafe. This is for demo/testing only.
+# leaves a core for the event loop
+PY_POOL_SIZE = max(1, (os.cpu_count() or 1) - 1)
+# Set QOTD_PY_INPROCESS=1 to exec submissions in a server thread instead of the worker pool:
+# no IPC, but no resource limits and no way to interrupt blocking calls. Trusted/dev use only.
+PY_EVAL_INPROCESS = os.environ.get("QOTD_PY_INPROCESS") == "1"
+# in-process submissions evaluated at once; leaves a core for the event loop
+PY_MAX_CONCURRENT_EVALS = max(1, (os.cpu_count() or 1) - 1)
+# evaluation slots: one per pool worker (one per evaluating thread in-process). A submission holds
+# a slot for each batch it runs, so a dispatched batch always has a free worker. Both are created
+# at startup, on the serving loop; PY_EVAL_TURN lets one submission reserve its slots at a time.
+PY_EVAL_SEM: Optional[asyncio.Semaphore] = None
+PY_EVAL_TURN: Optional[asyncio.Lock] = None
+
+python_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _new_python_pool() -> ProcessPoolExecutor:
+    # forkserver keeps workers from inheriting the server's threads and event loop. The fork server
+    # preloads only sandbox, so a new worker neither imports the app nor re-runs __main__.
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["sandbox"])
+    pool = ProcessPoolExecutor(max_workers=PY_POOL_SIZE, mp_context=ctx, initializer=sandbox.init_worker)
+    # workers are spawned on demand; start them all now rather than inside the first submissions' time_ms
+    for _ in range(PY_POOL_SIZE):
+        pool.submit(os.getpid)
+    return pool
+
+
+def _replace_python_pool(pool: ProcessPoolExecutor):
+    # Kill the pool's workers (one may be stuck in a submission that ignores its deadline) and start
+    # a fresh pool, unless a concurrent task already replaced this one. Work still running on the old
+    # pool fails with BrokenProcessPool.
+    global python_pool
+    # also covers shutdown, which clears python_pool (and a shut-down executor has no process table)
+    if python_pool is not pool or pool._processes is None:
+        return
+    for proc in list(pool._processes.values()):
+        proc.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+    python_pool = _new_python_pool()
+
+
+async def _run_in_python_pool(code_bytes: bytes, inputs: List[str], timeout_sec: float) -> Tuple[List[Tuple[Optional[str], Optional[str]]], bool]:
+    # Returns the batch's outputs and whether the evaluator itself failed.
+    # The caller holds a PY_EVAL_SEM slot for this batch, so the guard below times its run, not a queue.
+    pool = python_pool
+    if pool is None:
+        # shutting down; run_in_executor(None, ...) would run the submission on the server's threadpool
+        return [(None, "evaluator unavailable")] * len(inputs), True
+    loop = asyncio.get_running_loop()
+    try:
+        # per-case deadlines are enforced in the worker; this only guards against a worker that never answers
+        outputs = await asyncio.wait_for(
+            loop.run_in_executor(pool, sandbox.run_worker, code_bytes, inputs, timeout_sec),
+            timeout=sandbox.batch_budget_sec(len(inputs), timeout_sec),
+        )
+        return outputs, False
+    except asyncio.TimeoutError:
+        # the worker is still busy with this batch and would block every later submission
+        _replace_python_pool(pool)
+        return [(None, "timeout")] * len(inputs), True
+    except BrokenProcessPool:
+        # a worker was killed (e.g. hit a resource limit, or another submission's hung worker was reaped)
+        _replace_python_pool(pool)
+        return [(None, "worker crashed")] * len(inputs), True
+
+
+async def evaluate_python_submission(q: Question, source: str, timeout_sec: int = 2) -> SubmissionResponse:
+    inputs = [tc.input or "" for tc in q.test_cases]
+    # split the cases into at most one batch per worker: each worker execs the source once for its
+    # whole batch, and the batches still run in parallel
+    size = len(inputs) if PY_EVAL_INPROCESS else -(-len(inputs) // PY_POOL_SIZE)
+    size = size or 1
+    n_slots = -(-len(inputs) // size) or 1
+    # a burst of submissions waits here instead of piling up in the pool queue / threadpool; every
+    # slot is reserved before the timer starts so queueing does not count against the submitter
+    held = 0
+    try:
+        async with PY_EVAL_TURN:
+            while held < n_slots:
+                await PY_EVAL_SEM.acquire()
+                held += 1
+        return await _evaluate_python_submission(q, source, inputs, size, timeout_sec)
+    finally:
+        for _ in range(held):
+            PY_EVAL_SEM.release()
+
 
+async def _evaluate_python_submission(q: Question, source: str, inputs: List[str], size: int, timeout_sec: int) -> SubmissionResponse:
+    start = time.time()
+    evaluator_failed = False
+    try:
+        code = compile(source, "<submission>", "exec")
+    except SyntaxError as e:
+        outputs = [(None, "__ERROR__:" + str(e))] * len(inputs)
+    else:
+        if PY_EVAL_INPROCESS:
+            outputs = await anyio.to_thread.run_sync(sandbox.exec_submission, code, inputs, timeout_sec, sandbox.thread_deadline)
+        else:
+            code_bytes = marshal.dumps(code)
+            batches = await asyncio.gather(*[_run_in_python_pool(code_bytes, inputs[i:i + size], timeout_sec) for i in range(0, len(inputs), size)])
+            outputs = [out for batch, _ in batches for out in batch]
+            evaluator_failed = any(failed for _, failed in batches)
 
-def evaluate_python_submission(q: Question, source: str, timeout_sec: int = 2) -> SubmissionResponse:
     results = []
     passed = 0
-    start = time.time()
-    # We'll attempt to run the code for each test case by piping input to `python -c "<source>\nprint(solve(sys.stdin.read()))"`.
-    # WARNING: executing arbitrary code is unsafe. This is for demo/testing only.
-    wrapper = (
-        "import sys\n"
-        "def _run():\n"
-        "    import sys\n"
-        "    data = sys.stdin.read()\n"
-        "    try:\n"
-        "        # the user code can define solve(input_str) to return answer string\n"
-        "        globals_dict = {}\n"
-        "        locals_dict = {}\n"
-        "        exec(source_code, globals_dict, locals_dict)\n"
-        "        if 'solve' in locals_dict:\n"
-        "            out = locals_dict['solve'](data.strip())\n"
-        "        elif 'solve' in globals_dict:\n"
-        "            out = globals_dict['solve'](data.strip())\n"
-        "        else:\n"
-        "            out = ''\n"
-        "        print(out, end='')\n"
-        "    except Exception as e:\n"
-        "        print('__ERROR__:' + str(e), end='')\n"
-        "if __name__ == '__main__':\n"
-        "    _run()\n"
-    )
-    for tc in q.test_cases:
-        try:
-            # assemble full code
-            full = f"source_code = '''{source}'''\n" + wrapper
-            proc = subprocess.run(["python", "-c", full], input=(tc.get("input") or '').encode('utf-8'), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout_sec)
-            out = proc.stdout.decode('utf-8')
-            err = proc.stderr.decode('utf-8')
-            if out.startswith("__ERROR__:"):
-                res = TestResult(input=tc.get("input"), expected_output=tc["expected_output"], actual_output=None, passed=False, error=out)
-            else:
-                ok = _compare_outputs(tc["expected_output"], out)
-                res = TestResult(input=tc.get("input"), expected_output=tc["expected_output"], actual_output=out, passed=ok, error=(err if err else None))
-                if ok:
-                    passed += 1
-        except subprocess.TimeoutExpired:
-            res = TestResult(input=tc.get("input"), expected_output=tc["expected_output"], actual_output=None, passed=False, error="timeout")
-        except Exception as e:
-            res = TestResult(input=tc.get("input"), expected_output=tc["expected_output"], actual_output=None, passed=False, error=str(e))
+    for tc, (out, err) in zip(q.test_cases, outputs):
+        if out is None:
+            res = TestResult.model_construct(input=tc.input, expected_output=tc.expected_output, actual_output=None, passed=False, error=err)
+        else:
+            ok = _compare_outputs(tc, out)
+            res = TestResult.model_construct(input=tc.input, expected_output=tc.expected_output, actual_output=out, passed=ok, error=err)
+            if ok:
+                passed += 1
         results.append(res)
     end = time.time()
-    return SubmissionResponse(correct=(passed == len(q.test_cases)), passed_count=passed, total=len(q.test_cases), results=results, time_ms=(end - start) * 1000)
+    res = SubmissionResponse.model_construct(correct=(passed == len(q.test_cases)), passed_count=passed, total=len(q.test_cases), results=results, time_ms=(end - start) * 1000)
+    res._evaluator_failed = evaluator_failed
+    return res
 
 # ---------- API Routes ----------
 
 @app.get("/api/qotd/today", response_model=QuestionOut)
-def get_today(reveal: bool = False):
+async def get_today(reveal: bool = False):
     q = store.get_today()
-    out = q.dict()
-    if not reveal:
-        out.pop("expected_solution", None)
-    return out
+    return Response(store.get_question_json(q.id, reveal), media_type="application/json")
 
 @app.get("/api/qotd/{q_id}", response_model=QuestionOut)
-def get_question(q_id: str, reveal: bool = False):
+async def get_question(q_id: str, reveal: bool = False):
     try:
-        q = store.get_question(q_id)
+        body = store.get_question_json(q_id, reveal)
     except KeyError:
         raise HTTPException(status_code=404, detail="Question not found")
-    out = q.dict()
-    if not reveal:
-        out.pop("expected_solution", None)
-    return out
+    return Response(body, media_type="application/json")
 
+# response_model only documents the schema: the result is built from trusted data, so it is dumped
+# straight into an ORJSONResponse instead of being validated again by FastAPI
 @app.post("/api/qotd/submit", response_model=SubmissionResponse)
-def submit(sub: SubmissionRequest):
+async def submit(sub: SubmissionRequest):
     try:
         q = store.get_question(sub.q_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Question not found")
 
     if sub.language == "output":
-        res = evaluate_output_submission(Question(**q.dict()), sub.answer)
+        res = await anyio.to_thread.run_sync(evaluate_output_submission, q, sub.answer)
     elif sub.language == "python":
-        res = evaluate_python_submission(q, sub.answer)
+        res = await evaluate_python_submission(q, sub.answer)
     else:
         raise HTTPException(status_code=400, detail="Unsupported submission language/type")
 
-    # update stats and leaderboard
-    store.update_stats(sub.q_id, sub.user, res.correct, res.time_ms)
-    res.message = "Submission evaluated"
-    return res
+    if res._evaluator_failed:
+        # an infrastructure failure is not the user's attempt; leave stats and leaderboard alone
+        res.message = "Evaluator error, please resubmit"
+    else:
+        # update stats and leaderboard
+        await store.update_stats(sub.q_id, sub.user, res.correct, res.time_ms)
+        res.message = "Submission evaluated"
+    return ORJSONResponse(res.model_dump())
 
 @app.get("/api/qotd/hints/{q_id}")
-def get_hints(q_id: str):
+async def get_hints(q_id: str):
     try:
         q = store.get_question(q_id)
     except KeyError:
@@ -283,25 +588,26 @@ def get_hints(q_id: str):
     return {"hints": q.hints}
 
 @app.get("/api/qotd/stats/{q_id}", response_model=Stats)
-def get_stats(q_id: str):
+async def get_stats(q_id: str):
     try:
         _ = store.get_question(q_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Question not found")
-    return store.get_stats(q_id)
+    return await store.get_stats(q_id)
 
-@app.get("/api/leaderboard")
-def leaderboard(top: int = 10):
-    return [e.dict() for e in store.get_leaderboard(top=top)]
+# response_model only documents the schema: returning a Response directly skips FastAPI's validation
+@app.get("/api/leaderboard", response_model=List[LeaderboardEntry])
+async def leaderboard(top: int = 10):
+    return ORJSONResponse(await store.get_leaderboard(top=top))
 
 @app.post("/api/qotd")
-def add_question(q: Question):
+async def add_question(q: Question):
     try:
-        store.add_question(q.dict())
+        await store.add_question(q.dict())
     except KeyError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return {"ok": True}
 
 @app.get("/")
-def root():
+async def root():
     return {"msg": "QOTD Backend - visit /docs for API docs"}
@@ -0,0 +1,136 @@
+# Runs submitted Python code: the pool worker entry points and the in-process exec path.
+# WARNING: executing arbitrary code is unsafe. This is for demo/testing only.
+# Kept to the stdlib and free of app imports: pool workers import only this module, so they start fast.
+from typing import Any, Dict, List, Optional, Tuple
+import builtins
+import contextlib
+import ctypes
+import io
+import marshal
+import signal
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows: only the in-process path (exec_submission + thread_deadline) is available
+    resource = None
+
+# the pool workers need per-process resource limits and SIGALRM deadlines
+POOL_SUPPORTED = resource is not None and hasattr(signal, "setitimer")
+
+WORKER_CPU_SLACK_SEC = 1  # CPU allowed per task beyond its wall-clock budget before SIGXCPU kills the worker
+WORKER_MEM_BYTES = 256 * 1024 * 1024
+WORKER_MAX_FILES = 64
+
+
+def init_worker():
+    resource.setrlimit(resource.RLIMIT_AS, (WORKER_MEM_BYTES, WORKER_MEM_BYTES))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (WORKER_MAX_FILES, WORKER_MAX_FILES))
+
+
+# Builtins exposed to submissions. This trims the obvious I/O entry points and silences print();
+# it is not a security boundary (a submission can still import os). Each exec gets its own copy,
+# since pool workers (and the server, in in-process mode) outlive any single submission.
+_BLOCKED_BUILTINS = {"open", "input", "breakpoint", "exit", "quit", "help"}
+SUBMISSION_BUILTINS = {k: v for k, v in vars(builtins).items() if k not in _BLOCKED_BUILTINS}
+SUBMISSION_BUILTINS["print"] = lambda *args, **kwargs: None
+
+
+class SubmissionTimeout(BaseException):
+    # BaseException so a submission's own `except Exception` cannot swallow its deadline
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise SubmissionTimeout()
+
+
+@contextlib.contextmanager
+def _alarm_deadline(timeout_sec: float):
+    # SIGALRM only works on the main thread, i.e. inside a pool worker
+    signal.setitimer(signal.ITIMER_REAL, timeout_sec)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+@contextlib.contextmanager
+def thread_deadline(timeout_sec: float):
+    # Raises SubmissionTimeout asynchronously in the calling thread once the deadline passes.
+    # Only interrupts Python bytecode; a blocking C call (e.g. time.sleep) runs to completion.
+    tid = threading.get_ident()
+    lock = threading.Lock()
+    state = {"done": False, "fired": False}
+
+    def fire():
+        with lock:
+            if not state["done"]:
+                state["fired"] = True
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(tid), ctypes.py_object(SubmissionTimeout))
+
+    timer = threading.Timer(timeout_sec, fire)
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
+        with lock:
+            state["done"] = True
+        if state["fired"]:
+            # drop the injected exception if it has not been raised yet, so it cannot escape later
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(tid), None)
+            raise SubmissionTimeout()
+
+
+def exec_submission(code, inputs: List[str], timeout_sec: float, deadline) -> List[Tuple[Optional[str], Optional[str]]]:
+    # exec the submission once, then call solve() per input, each step under `deadline`.
+    # Returns one (output, error) pair per input.
+    namespace: Dict[str, Any] = {"__name__": "__submission__", "__builtins__": dict(SUBMISSION_BUILTINS)}
+    try:
+        with deadline(timeout_sec):
+            exec(code, namespace)
+    except SubmissionTimeout:
+        return [(None, "timeout")] * len(inputs)
+    except Exception as e:
+        return [(None, "__ERROR__:" + str(e))] * len(inputs)
+
+    solve = namespace.get("solve")
+    outputs = []
+    for data in inputs:
+        if solve is None:
+            outputs.append(("", None))
+            continue
+        try:
+            with deadline(timeout_sec):
+                out = solve(data.strip())
+            outputs.append((str(out), None))
+        except SubmissionTimeout:
+            outputs.append((None, "timeout"))
+        except Exception as e:
+            outputs.append((None, "__ERROR__:" + str(e)))
+    return outputs
+
+
+def batch_budget_sec(n_inputs: int, timeout_sec: float) -> float:
+    # exec plus one solve() per input, each bounded by timeout_sec
+    return timeout_sec * (n_inputs + 1) + 1
+
+
+def _arm_cpu_limit(budget_sec: float):
+    # Workers are long-lived, so RLIMIT_CPU is re-armed per task relative to the CPU already used
+    # rather than set once as a lifetime budget that ordinary traffic would eventually exhaust.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + budget_sec) + WORKER_CPU_SLACK_SEC
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_worker(code_bytes: bytes, inputs: List[str], timeout_sec: float) -> List[Tuple[Optional[str], Optional[str]]]:
+    # Runs inside a pool worker.
+    _arm_cpu_limit(batch_budget_sec(len(inputs), timeout_sec))
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return exec_submission(marshal.loads(code_bytes), inputs, timeout_sec, _alarm_deadline)